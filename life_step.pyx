@@ -0,0 +1,53 @@
+"""The life_step module implements the Game of Life update as a compiled
+kernel for when Numba is not available.
+
+Build it in place with "cythonize -i life_step.pyx", or let mechanics build
+it on import through pyximport.
+"""
+
+cimport cython
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef inline void step_edge_cell(const unsigned char[:, ::1] src, unsigned char[:, ::1] dst,
+                                Py_ssize_t row, Py_ssize_t col) noexcept nogil:
+    """Writes the next state of the cell at ROW, COL into DST, treating cells
+    past the edge of SRC as dead
+    """
+    cdef Py_ssize_t r, c
+    cdef int n = 0
+    for r in range(max(row - 1, 0), min(row + 2, src.shape[0])):
+        for c in range(max(col - 1, 0), min(col + 2, src.shape[1])):
+            n += src[r, c]
+    n -= src[row, col]
+    dst[row, col] = (n | src[row, col]) == 3
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cpdef void step(const unsigned char[:, ::1] src, unsigned char[:, ::1] dst) noexcept:
+    """Writes the generation following SRC into DST.
+
+    A cell is alive next if its neighbor count OR-ed with its own state is
+    exactly 3, which covers both births and survivals. Interior cells are
+    updated without any bounds checks; the one-cell border is handled in
+    separate passes.
+    """
+    cdef Py_ssize_t height = src.shape[0]
+    cdef Py_ssize_t width = src.shape[1]
+    cdef Py_ssize_t i, j
+    cdef int n
+
+    with nogil:
+        for i in range(1, height - 1):
+            for j in range(1, width - 1):
+                n = src[i-1, j-1] + src[i-1, j] + src[i-1, j+1] \
+                    + src[i, j-1]               + src[i, j+1] \
+                    + src[i+1, j-1] + src[i+1, j] + src[i+1, j+1]
+                dst[i, j] = (n | src[i, j]) == 3
+
+        for j in range(width):
+            step_edge_cell(src, dst, 0, j)
+            step_edge_cell(src, dst, height - 1, j)
+        for i in range(1, height - 1):
+            step_edge_cell(src, dst, i, 0)
+            step_edge_cell(src, dst, i, width - 1)
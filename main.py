@@ -1,59 +1,60 @@
 import sys
+import math
+import numpy as np
 from PyQt6.QtWidgets import QGraphicsScene, QGraphicsView, QMainWindow, QPushButton, \
-                            QGraphicsEllipseItem, QApplication, QVBoxLayout, QWidget, \
+                            QGraphicsPixmapItem, QGraphicsItem, QApplication, QVBoxLayout, QWidget, \
                             QHBoxLayout, QComboBox
-from PyQt6.QtGui import QBrush, QColor, QPainter
-from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtGui import QColor, QImage, QPixmap, QTransform
+from PyQt6.QtCore import Qt, QTimer, QObject, QThread, QMutex, QMutexLocker, \
+                         pyqtSignal, pyqtSlot
 from mechanics import *
 
 """Global attributes:
 
-DEAD_COLOR: QBrush to use for dead cells
-ALIVE_COLOR: QBrush to use for alive cells
+DEAD_COLOR: QColor to use for dead cells
+ALIVE_COLOR: QColor to use for alive cells
 CELL_SIZE: integer representing the size of the cell in pixels
 CANVAS_HEIGHT: height of the canvas
 CANVAS_WIDTH: width of the canvas
+FRAME_INTERVAL: shortest time in milliseconds between two redraws of the board
 """
-DEAD_COLOR = QBrush(QColor(0, 0, 0))
-ALIVE_COLOR = QBrush(QColor(255, 165, 0))
+DEAD_COLOR = QColor(0, 0, 0)
+ALIVE_COLOR = QColor(255, 165, 0)
 CELL_SIZE = 6
 CANVAS_HEIGHT = 660
 CANVAS_WIDTH = 800
+FRAME_INTERVAL = 16
 
-class Cell(QGraphicsEllipseItem):
-    """A Cell object representing a single cell in the game
+class LifeWorker(QObject):
+    """A LifeWorker object that advances the game off the GUI thread
 
     Attributes:
-    row -- y-coordinate of position
-    col -- x-coordinate of position
-    state -- a number 0 or 1, with 1 meaning alive and 0 meaning dead
+    board -- the mechanics.Board object to advance
+    board_lock -- a QMutex held whenever board is read or modified
+    state_ready -- a signal emitted after every step with a copy of the new state, \
+        or None if the state did not change
     """
-    def __init__(self, row, col, state = 0):
-        """Create a Cell at position (ROW, COL) with state STATE.
-
-        row -- An integer; the y-coordinate of position
-        col -- An integer; the x-coordinate of position
+    state_ready = pyqtSignal(object)
+
+    def __init__(self, board, board_lock):
+        """Create a LifeWorker advancing BOARD, guarded by BOARD_LOCK."""
+        super().__init__()
+        self.board = board
+        self.board_lock = board_lock
+
+    @pyqtSlot(int)
+    def step(self, generations):
+        """Advances self.board by up to GENERATIONS generations, stopping early once
+        the board stops changing, and emits state_ready
         """
-        assert state == 0 or state == 1, "State argument provided is invalid"
-
-        super().__init__(0, 0, CELL_SIZE, CELL_SIZE)
-        self.row = row
-        self.col = col
-        self.setPos(CELL_SIZE * self.row, CELL_SIZE * self.col)
-        if state == 1:
-            self.setBrush(ALIVE_COLOR)
-        else:
-            self.setBrush(DEAD_COLOR)
-
-    def kill_cell(self):
-        """Kills cell by changing it's color to DEAD_COLOR"""
-        self.setBrush(DEAD_COLOR)
-        self.update()
-    
-    def generate_cell(self):
-        """Makes cell alive by changing it's color to ALIVE_COLOR"""
-        self.setBrush(ALIVE_COLOR)
-        self.update()
+        with QMutexLocker(self.board_lock):
+            changed = False
+            for _ in range(generations):
+                if not self.board.next_state():
+                    break
+                changed = True
+            state = self.board.get_state().copy() if changed else None
+        self.state_ready.emit(state)
 
 
 class Canvas(QGraphicsScene):
@@ -66,13 +67,29 @@ class Canvas(QGraphicsScene):
     height -- the height of the grid; this number represents the number of cells one \
         can fit vertically across (NOT the screen height)
     board -- a mechanics.Board object representing the current state of the game
-    gui_board -- a 2D array of Cell objects corresponding with self.board
+    board_item -- a QGraphicsPixmapItem showing self.board, one pixel per cell scaled \
+        up by CELL_SIZE
+    _prev_state -- a copy of the board state currently shown by board_item
+    _image -- an indexed 8-bit QImage sharing its pixel data with self._prev_state
     game_paused -- a boolean representing whether the pause button has been hit; game \
         initially starts paused
     speed -- a number controlling how frequently the board is updated; higher means more \
         frequently
-    update_timer -- a QTimer to update the Canvas every 800 / self.speed milliseconds
+    update_timer -- a QTimer to update the Canvas every 400 / self.speed milliseconds, \
+        but no more often than every FRAME_INTERVAL milliseconds; only runs while the \
+        game is playing and the board is still changing
+    generations_per_update -- the number of generations computed on every update; more \
+        than 1 at speeds that would otherwise update faster than FRAME_INTERVAL
+    board_lock -- a QMutex held whenever self.board is read or modified
+    worker -- a LifeWorker computing new generations of self.board
+    worker_thread -- the QThread self.worker runs in
+    step_requested -- a signal asking self.worker for the next generations
+    _step_pending -- a boolean representing whether self.worker is computing a step
+    _board_edited -- a boolean representing whether the board was edited since the \
+        last step was requested
     """
+    step_requested = pyqtSignal(int)
+
     def __init__(self, width, height):
         """Create a Canvas of width WIDTH and height HEIGHT.
 
@@ -85,72 +102,139 @@ class Canvas(QGraphicsScene):
         # Provided width and height are not used here to ensure there are no gaps 
         # at the edge of the board
         super().__init__(0, 0, self.height * CELL_SIZE, self.width * CELL_SIZE)
+        # The scene only ever holds the board item, so a BSP index is pure overhead
+        self.setItemIndexMethod(QGraphicsScene.ItemIndexMethod.NoIndex)
         self.board = Board(self.width, self.height)
-        self.gui_board = [ [None] * self.width for _ in range(self.height) ]
+        self._prev_state = np.zeros((self.height, self.width), dtype=np.uint8)
         self.game_paused = True
         self.speed = 1
-
-        # Add items to the canvas
-        for i in range(self.height):
-            for j in range(self.width):
-                self.gui_board[i][j] = Cell(i, j, 0)
-                self.addItem(self.gui_board[i][j])
+        self.generations_per_update = 1
+
+        self._image = QImage(self._prev_state.data, self.width, self.height, self.width,
+                             QImage.Format.Format_Indexed8)
+        self._image.setColorTable([DEAD_COLOR.rgb(), ALIVE_COLOR.rgb()])
+        self.board_item = QGraphicsPixmapItem()
+        # Board rows run along the x-axis, so the image is transposed as well as scaled
+        self.board_item.setTransform(QTransform(0, CELL_SIZE, CELL_SIZE, 0, 0, 0))
+        # Reuse the rasterized board for repaints that happen between state changes
+        self.board_item.setCacheMode(QGraphicsItem.CacheMode.DeviceCoordinateCache)
+        self.addItem(self.board_item)
+        self.render_board()
 
         self.update_timer = QTimer(self)
         self.update_timer.setInterval(400)
         self.update_timer.timeout.connect(self.update)
-        self.update_timer.start()
+
+        self.board_lock = QMutex()
+        self._step_pending = False
+        self._board_edited = False
+        self.worker = LifeWorker(self.board, self.board_lock)
+        self.worker_thread = QThread()
+        self.worker.moveToThread(self.worker_thread)
+        self.step_requested.connect(self.worker.step, Qt.ConnectionType.QueuedConnection)
+        self.worker.state_ready.connect(self.apply_state, Qt.ConnectionType.QueuedConnection)
+        self.worker_thread.start()
 
     def toggle_pause(self):
         """Pauses the game if currently playing. Otherwise, plays the game"""
-        self.game_paused = not self.game_paused
+        if self.game_paused:
+            self.game_paused = False
+            self.update_timer.start()
+        else:
+            self.force_pause()
     
     def force_pause(self):
-        """Pauses the game"""
+        """Pauses the game and stops the update timer"""
         self.game_paused = True
+        self.update_timer.stop()
     
     def change_speed(self, new_speed):
-        """Change speed to NEW_SPEED"""
+        """Change speed to NEW_SPEED and set the update interval to match. Speeds
+        that would update faster than once every FRAME_INTERVAL milliseconds
+        compute several generations per update instead
+        """
         self.speed = new_speed
+        interval = 400 / self.speed
+        self.generations_per_update = max(1, math.ceil(FRAME_INTERVAL / interval))
+        self.update_timer.setInterval(int(interval * self.generations_per_update))
     
     def randomize_game(self):
-        """Randomize the state of the board. Maintains the correspondence with 
-        self.board. Cells are never removed from canvas
-        """
-        self.board.randomize_board()
-        for i in range(self.height):
-            for j in range(self.width):
-                if (self.board.get_item(i,j) == 1):
-                    self.gui_board[i][j].generate_cell()
-                else:
-                    self.gui_board[i][j].kill_cell()
+        """Randomize the state of the board and redraw it"""
+        self.edit_board(self.board.randomize_board)
     
     def reset_game(self):
-        """Kills all cells in self.gui_board and sets everything in self.board to 0"""
-        for i in range(self.height):
-            for j in range(self.width):
-                self.gui_board[i][j].kill_cell()
-                self.board.set_item(i, j, 0)
+        """Sets everything in self.board to 0 and redraws the board"""
+        self.edit_board(self.board.clear)
+
+    def edit_board(self, edit, *args):
+        """Calls EDIT(*ARGS) to modify self.board while holding board_lock, then
+        redraws the board and restarts the game if it had gone idle
+        """
+        with QMutexLocker(self.board_lock):
+            edit(*args)
+        self._board_edited = True
+        self.redraw()
+        self.wake()
+
+    def redraw(self):
+        """Brings board_item in line with self.board. Nothing is redrawn if the
+        state has not changed since the last redraw
+        """
+        with QMutexLocker(self.board_lock):
+            state = self.board.get_state()
+            if np.array_equal(state, self._prev_state):
+                return
+            np.copyto(self._prev_state, state)
+        self.render_board()
+
+    def render_board(self):
+        """Uploads self._prev_state to board_item through self._image. Setting the
+        pixmap also invalidates the item's cached raster
+        """
+        self.board_item.setPixmap(QPixmap.fromImage(self._image))
      
+    def wake(self):
+        """Restarts update_timer if the game is playing but the timer was stopped
+        because the board had stopped changing
+        """
+        if not self.game_paused and not self.update_timer.isActive():
+            self.update_timer.start()
+
     def update(self):
-        """Updates the game by first setting a new update interval. Checks if game is 
-        paused before updating. Then updates gui_board
+        """Asks self.worker to advance the game by generations_per_update
+        generations. Only called by update_timer, which is stopped while the game
+        is paused. Does nothing if the previous step is still being computed
         """
-        self.update_timer.setInterval(int(400 / self.speed))
-        if self.game_paused:
+        if self._step_pending:
             return
-        self.board.next_state()
-        for i in range(self.height):
-            for j in range(self.width):
-                if self.board.get_item(i, j) == 1:
-                    self.gui_board[i][j].generate_cell()
-                else:
-                    self.gui_board[i][j].kill_cell()
-    
+        self._step_pending = True
+        self._board_edited = False
+        self.step_requested.emit(self.generations_per_update)
+
+    def apply_state(self, state):
+        """Shows STATE, the generation computed by self.worker. If STATE is None
+        the board has stopped changing, so update_timer is stopped until the user
+        edits the board. If the board was edited while the step was being
+        computed, the edited board is redrawn instead
+        """
+        self._step_pending = False
+        if self._board_edited:
+            self.redraw()
+        elif state is None:
+            self.update_timer.stop()
+        else:
+            np.copyto(self._prev_state, state)
+            self.render_board()
+
+    def shutdown(self):
+        """Stops update_timer and waits for the worker thread to finish"""
+        self.update_timer.stop()
+        self.worker_thread.quit()
+        self.worker_thread.wait()
     
     def mousePressEvent(self, e):
         """Handler for mouse press events. Left clicking a cell makes it alive
-        and right clicking a cell kills it
+        and right clicking a cell kills it. Clicks off the board are ignored
 
         e -- A QGraphicsSceneMouseEvent to handle
         """
@@ -158,16 +242,18 @@ class Canvas(QGraphicsScene):
             point = e.buttonDownScenePos(Qt.MouseButton.LeftButton)
             row = int(point.x() // CELL_SIZE)
             col = int(point.y() // CELL_SIZE)
- 
-            self.gui_board[row][col].generate_cell()
-            self.board.set_item(row, col, 1)
+            if not self.board.in_bounds(row, col):
+                return
+
+            self.edit_board(self.board.set_item, row, col, 1)
         elif e.button() == Qt.MouseButton.RightButton:
             point = e.buttonDownScenePos(Qt.MouseButton.RightButton)
             row = int(point.x() // CELL_SIZE)
             col = int(point.y() // CELL_SIZE)
+            if not self.board.in_bounds(row, col):
+                return
 
-            self.gui_board[row][col].kill_cell()
-            self.board.set_item(row, col, 0)
+            self.edit_board(self.board.set_item, row, col, 0)
 
 class MainWindow(QMainWindow):
     """A MainWindow object that represents the complete gui with buttons and canvas
@@ -189,8 +275,9 @@ class MainWindow(QMainWindow):
         self.canvas = Canvas(CANVAS_HEIGHT, CANVAS_WIDTH)
         self.game = QGraphicsView(self.canvas)
 
-        # Vectorizes graphics
-        self.game.setRenderHint(QPainter.RenderHint.Antialiasing)
+        # The board item covers the whole scene, so repaint the viewport in one go
+        self.game.setViewportUpdateMode(QGraphicsView.ViewportUpdateMode.FullViewportUpdate)
+        self.game.setOptimizationFlag(QGraphicsView.OptimizationFlag.DontSavePainterState, True)
         
         self.pause_play_text = "Play"
 
@@ -198,7 +285,7 @@ class MainWindow(QMainWindow):
         self.pause_button.clicked.connect(self.pause_game_button)
         self.pause_button.setText(self.pause_play_text)
 
-        self.speeds = ['0.5x', '1x', '1.5x', '2x', '2.5x', '3x', '4x', '5x']
+        self.speeds = ['0.5x', '1x', '1.5x', '2x', '2.5x', '3x', '4x', '5x', '10x', '25x', '50x']
 
         self.playback_button = QComboBox()
         self.playback_button.addItems(self.speeds)
@@ -224,7 +311,7 @@ class MainWindow(QMainWindow):
         button_layout.addWidget(self.reset_button)
 
         full_layout = QVBoxLayout()
-        full_layout.addWidget(QGraphicsView(self.canvas))
+        full_layout.addWidget(self.game)
         full_layout.addLayout(button_layout)
 
         widget = QWidget()
@@ -260,6 +347,14 @@ class MainWindow(QMainWindow):
         self.pause_play_text = "Play"
         self.pause_button.setText(self.pause_play_text)
     
+    def closeEvent(self, e):
+        """Shuts down the canvas before the window closes
+
+        e -- A QCloseEvent to handle
+        """
+        self.canvas.shutdown()
+        super().closeEvent(e)
+
     def playback_speed_button(self, text):
         """Modifies the speed of the game according to the selected speed option"""
         self.canvas.change_speed(float(str(text)[:-1]))
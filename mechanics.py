@@ -1,6 +1,86 @@
 """The mechanics module implements the rules behind Conway's Game of Life"""
 
-import random
+import sys
+import numpy as np
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+if njit is not None and sys.byteorder == 'little':
+    _ONE = np.uint64(1)
+    _TOP = np.uint64(63)
+
+    @njit(cache=True, inline='always')
+    def _row_sum(words, row, w):
+        """Returns the 3-cell horizontal sums of word W in ROW as two bit planes.
+
+        Bit k of the result pair (ones, twos) holds the number of alive cells
+        among bits k - 1, k and k + 1 of the row, pulling the outermost
+        neighbors from the adjacent words. W must not be the first or last
+        word of the row.
+        """
+        center = words[row, w]
+        before = words[row, w - 1]
+        after = words[row, w + 1]
+        left = (center << _ONE) | (before >> _TOP)
+        right = (center >> _ONE) | (after << _TOP)
+        t = left ^ right
+        return t ^ center, (left & right) | (t & center)
+
+    @njit(parallel=True, cache=True, boundscheck=False)
+    def _step(words, nxt):
+        """Writes the generation following the bit-packed board WORDS into NXT.
+
+        WORDS holds 64 cells per uint64, surrounded by all-dead words on every
+        side, so the inner loop needs no edge tests. The three horizontal sums
+        around each word are added bitwise into a 4-bit count of the 3x3 block
+        (including the cell), so 64 cells are updated per operation. Rows are
+        processed in parallel.
+        """
+        height, width = nxt.shape
+        for i in prange(height):
+            for w in range(width):
+                a0, a1 = _row_sum(words, i, w + 1)
+                b0, b1 = _row_sum(words, i + 1, w + 1)
+                c0, c1 = _row_sum(words, i + 2, w + 1)
+                u = a0 ^ b0
+                s0 = u ^ c0
+                k1 = (a0 & b0) | (u & c0)
+                v = a1 ^ b1
+                t1 = v ^ c1
+                k2 = (a1 & b1) | (v & c1)
+                s1 = t1 ^ k1
+                k1 &= t1
+                s2 = k2 ^ k1
+                s3 = k2 & k1
+                # Alive if the block holds 3 cells, or 4 cells including this one
+                nxt[i, w] = ~s3 & ((s0 & s1 & ~s2) | (~s0 & ~s1 & s2 & words[i + 1, w + 1]))
+
+    # Run the kernel once up front so it is compiled at import, and so Numba's
+    # thread pool is started on the importing thread; the TBB threading layer
+    # hangs at exit if its pool is first started from a worker thread
+    _step(np.zeros((3, 3), dtype=np.uint64), np.zeros((1, 1), dtype=np.uint64))
+else:
+    _step = None
+
+if _step is None:
+    try:
+        import life_step
+    except ImportError:
+        # Fall back to building life_step.pyx on the fly if Cython is installed
+        try:
+            import pyximport
+            hooks = pyximport.install(language_level=3)
+            try:
+                import life_step
+            finally:
+                pyximport.uninstall(*hooks)
+        except ImportError:
+            life_step = None
+else:
+    life_step = None
 
 class Board:
     """A Board object representing the state of the game using a 2D array
@@ -12,7 +92,15 @@ class Board:
     Attributes:
     _width -- width of the board
     _height -- height of the board
-    _state -- current state of the game
+    _state -- current state of the game; a (height, width) numpy array of uint8
+    _next -- buffer the next state is written into before being swapped with _state
+    _packed -- _state packed 64 cells per uint64 word with a border of dead words \
+        on every side, used by the Numba kernel
+    _next_packed -- buffer the Numba kernel writes the packed next state into
+    _tail_mask -- uint64 mask keeping only the bits of the last packed word that \
+        hold cells of the board
+    _padded -- zero-bordered copy of _state used by the shifted-sum neighbor count
+    _counts -- buffer the shifted-sum neighbor count is accumulated into
     """
 
     def __init__(self, width=800, height=600):
@@ -23,43 +111,67 @@ class Board:
         """
         self._width = width
         self._height = height
-        self._state = [ [0] * width for _ in range(height) ]
+        self._state = np.zeros((height, width), dtype=np.uint8)
+        self._next = np.zeros_like(self._state)
+        self._padded = np.zeros((height + 2, width + 2), dtype=np.uint8)
+        self._counts = np.zeros_like(self._state)
+        words = -(-width // 64)
+        self._packed = np.zeros((height + 2, words + 2), dtype=np.uint64)
+        self._next_packed = np.zeros((height, words), dtype=np.uint64)
+        self._tail_mask = np.uint64((1 << (width % 64 or 64)) - 1)
             
+    def in_bounds(self, row, col):
+        """Returns whether position ROW, COL lies on the board."""
+        return 0 <= row < self._height and 0 <= col < self._width
+
     def get_item(self, row, col):
-        """Returns the item in position ROW, COL."""
-        assert 0 <= row and row <= self._height \
-            and 0 <= col and col <= self._width, "List index out of bounds"
-        return self._state[row][col] 
+        """Returns the item in position ROW, COL.
+
+        ROW and COL must lie on the board (see in_bounds); they are not
+        checked here.
+        """
+        return self._state[row, col]
+
+    def get_state(self):
+        """Returns the current state as a (height, width) numpy array of uint8.
+
+        The array is owned by the board and is reused by later generations,
+        so callers should copy it if they need to keep it around.
+        """
+        return self._state
 
     def set_item(self, row, col, value):
-        """Sets the item in position ROW, COL equal to VALUE."""
-        assert 0 <= row and row <= self._height \
-            and 0 <= col and col <= self._width, "List index out of bounds"
-        self._state[row][col] = value
+        """Sets the item in position ROW, COL equal to VALUE.
+
+        ROW and COL must lie on the board (see in_bounds); they are not
+        checked here.
+        """
+        self._state[row, col] = value
     
     def randomize_board(self):
         """Randomly fills the board with alive and dead cells"""
-        for i in range(self._height):
-            for j in range(self._width):
-                self._state[i][j] = random.randint(0,1)
-        
-    def count_alive_neighbors(self, row, col):
-        """Returns the number of alive cells adjacent to ROW, COL
-
-        Uses 8-cell Moore neighborhood to compute number of alive cells
+        self._state[:] = np.random.randint(0, 2, size=self._state.shape, dtype=np.uint8)
+
+    def clear(self):
+        """Kills every cell on the board"""
+        self._state.fill(0)
+
+    def count_alive_neighbors(self):
+        """Returns an array holding the number of alive cells adjacent to
+        every cell of the board
+
+        Uses 8-cell Moore neighborhood; cells past the edge of the board
+        count as dead. Sums the eight shifted views of the zero-padded board
+        into self._counts, which is overwritten on the next call.
         """
-        assert 0 <= row and row <= self._height \
-            and 0 <= col and col <= self._width, "List index out of bounds"
-        count = 0
-
-        # For computing the cell indexes of the 8 adjacent cells
-        dr = [0, 0, 1, 1, 1, -1, -1, -1]
-        dc = [-1, 1, -1, 0, 1, -1, 0, 1]
-        for i in range(len(dr)):
-            if (row + dr[i] < self._height and row + dr[i] >= 0 \
-                and col + dc[i] < self._width and col + dc[i] >= 0):
-                count += self._state[row + dr[i]][col + dc[i]]
-        return count
+        p = self._padded
+        p[1:-1, 1:-1] = self._state
+        n = self._counts
+        np.add(p[:-2, :-2], p[:-2, 1:-1], out=n)
+        for view in (p[:-2, 2:], p[1:-1, :-2], p[1:-1, 2:],
+                     p[2:, :-2], p[2:, 1:-1], p[2:, 2:]):
+            n += view
+        return n
 
     def next_state(self):
         """"Computes the next stage of the game using these simplified rules:
@@ -67,18 +179,41 @@ class Board:
         1. If there is a dead cell with exactly 3 neighbors it becomes alive
         2. If there is an alive cell with 2 or 3 neighbors it stays alive
         3. All other cells are made dead (even if dead before)
+
+        The new state is written into self._next, which is then swapped with
+        self._state, so no board-sized array is allocated per generation.
+        With Numba available the board is bit-packed and the compiled _step
+        kernel computes the next generation 64 cells at a time. Otherwise the
+        compiled Cython life_step kernel fills self._next if it is available,
+        and failing that the rules are applied to count_alive_neighbors. All
+        three rules fold into one test: a cell is alive next if its neighbor
+        count OR-ed with its own state is exactly 3.
+
+        Returns whether the state changed. An empty board never changes, so
+        it is returned as is without computing anything.
         """
-        newState = [ [0] * self._width for i in range(self._height) ]
-        for i in range(self._height):
-            for j in range(self._width):
-                newState[i][j] = self._state[i][j]
-        
-        for i in range(self._height):
-            for j in range(self._width):
-                if self._state[i][j] == 1 and self.count_alive_neighbors(i,j) in [2,3]:
-                    newState[i][j] = 1
-                elif self._state[i][j] == 0 and self.count_alive_neighbors(i,j) == 3:
-                    newState[i][j] = 1
-                else:
-                    newState[i][j] = 0
-        self._state = newState
+        if not self._state.any():
+            return False
+        if _step is not None:
+            packed_bytes = self._packed.view(np.uint8)
+            packed_bytes[1:-1, 8:8 + (self._width + 7) // 8] = \
+                np.packbits(self._state, axis=1, bitorder='little')
+            _step(self._packed, self._next_packed)
+            # The kernel also fills the bits past the last column; clear them
+            # so they cannot make a static board look changed
+            self._next_packed[:, -1] &= self._tail_mask
+            if np.array_equal(self._packed[1:-1, 1:-1], self._next_packed):
+                return False
+            self._next[:] = np.unpackbits(self._next_packed.view(np.uint8), axis=1,
+                                          count=self._width, bitorder='little')
+        else:
+            if life_step is not None:
+                life_step.step(self._state, self._next)
+            else:
+                n = self.count_alive_neighbors()
+                n |= self._state
+                np.equal(n, 3, out=self._next, casting='unsafe')
+            if np.array_equal(self._state, self._next):
+                return False
+        self._state, self._next = self._next, self._state
+        return True
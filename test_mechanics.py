@@ -0,0 +1,45 @@
+"""Regression tests for the mechanics module"""
+
+import itertools
+import unittest
+import numpy as np
+from mechanics import Board
+
+"""Global attributes:
+
+EDGE_STILL_LIFE: a still life that touches the right and bottom edges of the board
+"""
+EDGE_STILL_LIFE = np.array([[0, 0, 0, 0],
+                            [0, 0, 1, 1],
+                            [0, 1, 0, 1],
+                            [1, 0, 0, 1],
+                            [1, 1, 1, 1]], dtype=np.uint8)
+
+class NextStateTest(unittest.TestCase):
+    """Tests for the value returned by Board.next_state"""
+
+    def test_edge_still_life_is_unchanged(self):
+        """A still life against the right edge must not be reported as changed,
+        whether or not the width is a multiple of 64
+        """
+        for width in (110, 128, 65, 4):
+            board = Board(width, 133)
+            board.get_state()[-5:, -4:] = EDGE_STILL_LIFE
+            self.assertFalse(board.next_state(), "width %d" % width)
+            np.testing.assert_array_equal(board.get_state()[-5:, -4:], EDGE_STILL_LIFE)
+
+    def test_corner_patterns_report_changes(self):
+        """next_state returns True exactly when the state changes, for every
+        4x4 pattern in the bottom-right corner of the app's 110-wide board
+        """
+        board = Board(110, 133)
+        for cells in itertools.product((0, 1), repeat=16):
+            board.clear()
+            board.get_state()[-4:, -4:] = np.reshape(cells, (4, 4))
+            before = board.get_state().copy()
+            changed = board.next_state()
+            self.assertEqual(changed, not np.array_equal(before, board.get_state()), cells)
+
+
+if __name__ == '__main__':
+    unittest.main()